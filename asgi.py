@@ -0,0 +1,223 @@
+"""ASGI入口：在asyncio事件循环上接收请求体和发送响应，慢速客户端不再占用工作线程
+
+uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+仍然运行同一个Flask应用、同一套模型和配置。请求体先异步接收到内存或上传目录的
+临时文件，再交给线程池中的Flask处理；下载时每次只在线程池中读取一块文件内容，
+等待客户端接收数据时不占用线程。数据库访问和文件读写都在线程池中执行，不阻塞事件循环。
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.wsgi import FileWrapper
+
+from lM_share import app as flask_app, create_app, get_config, UPLOAD_FORM_OVERHEAD
+
+# 线程池大小：只决定同时处理多少个请求的数据库和磁盘操作，与并发连接数无关
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', '32'))
+# 请求体不超过此大小时保存在内存中，否则写入上传目录的临时文件
+ASGI_BODY_MEMORY_LIMIT = 1024 * 1024
+# 下载时每次从磁盘读取的块大小
+ASGI_READ_SIZE = 256 * 1024
+
+
+class AsyncFileWrapper(FileWrapper):
+    """提供给Flask的wsgi.file_wrapper，加大每块的大小，减少线程池往返次数"""
+
+    def __init__(self, file, buffer_size=ASGI_READ_SIZE):
+        super().__init__(file, max(buffer_size, ASGI_READ_SIZE))
+
+
+class RequestBodyTooLarge(Exception):
+    pass
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class AsyncWSGIBridge:
+    """把WSGI应用包装为ASGI应用，网络等待在事件循环上完成，阻塞操作放到线程池"""
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+
+    async def run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        try:
+            body = await self.receive_body(scope, receive)
+        except RequestBodyTooLarge as e:
+            await self.send_json(send, 413, {'error': str(e)})
+            return
+        except ClientDisconnected:
+            return
+
+        try:
+            environ = self.build_environ(scope, body)
+            await self.run_wsgi(environ, receive, send)
+        finally:
+            await self.run_blocking(body.close)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def max_body_size(self):
+        with flask_app.app_context():
+            max_upload_size = int(get_config('max_upload_size', '50')) * 1024 * 1024
+            upload_folder = get_config('upload_folder', 'uploads')
+        os.makedirs(upload_folder, exist_ok=True)
+        return max_upload_size, upload_folder
+
+    async def receive_body(self, scope, receive):
+        """异步接收整个请求体，超过上传大小限制时提前拒绝"""
+        max_upload_size, upload_folder = await self.run_blocking(self.max_body_size)
+        size_limit = max_upload_size + UPLOAD_FORM_OVERHEAD
+        size_error = f'文件大小超过限制（{max_upload_size // (1024*1024)}MB）'
+
+        for name, value in scope['headers']:
+            if name == b'content-length' and value.isdigit() and int(value) > size_limit:
+                raise RequestBodyTooLarge(size_error)
+
+        body = tempfile.SpooledTemporaryFile(max_size=ASGI_BODY_MEMORY_LIMIT, dir=upload_folder)
+        received = 0
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    raise ClientDisconnected()
+                chunk = message.get('body', b'')
+                if chunk:
+                    received += len(chunk)
+                    if received > size_limit:
+                        raise RequestBodyTooLarge(size_error)
+                    if received > ASGI_BODY_MEMORY_LIMIT:
+                        await self.run_blocking(body.write, chunk)
+                    else:
+                        body.write(chunk)
+                if not message.get('more_body', False):
+                    break
+        except BaseException:
+            await self.run_blocking(body.close)
+            raise
+        body.seek(0)
+        return body
+
+    def build_environ(self, scope, body):
+        body_size = body.seek(0, os.SEEK_END)
+        body.seek(0)
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'CONTENT_LENGTH': str(body_size),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            'wsgi.file_wrapper': AsyncFileWrapper,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+            environ['REMOTE_PORT'] = str(scope['client'][1])
+
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_LENGTH':
+                continue
+            if name != 'CONTENT_TYPE':
+                name = f'HTTP_{name}'
+            if name in environ:
+                environ[name] = f'{environ[name]},{value}'
+            else:
+                environ[name] = value
+        return environ
+
+    async def run_wsgi(self, environ, receive, send):
+        response = {}
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            # 请求体已读完，之后收到的消息只可能是客户端断开
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+
+        def call_app():
+            iterable = self.wsgi_app(environ, start_response)
+            iterator = iter(iterable)
+            # start_response可能推迟到第一次迭代时才调用
+            if 'status' in response:
+                return iterable, iterator, None
+            return iterable, iterator, next(iterator, b'')
+
+        iterable, iterator, first_chunk = await self.run_blocking(call_app)
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response['status'],
+                'headers': response['headers']
+            })
+            if first_chunk:
+                await send({'type': 'http.response.body', 'body': first_chunk, 'more_body': True})
+
+            # 每块在线程池中读取，发送时在事件循环上等待慢速客户端
+            while not disconnected.is_set():
+                chunk = await self.run_blocking(next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            watcher.cancel()
+            if hasattr(iterable, 'close'):
+                await self.run_blocking(iterable.close)
+
+    async def send_json(self, send, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+create_app()
+app = AsyncWSGIBridge(flask_app)
@@ -0,0 +1,16 @@
+"""基准测试共用的运行环境：在临时目录中使用独立的SQLite数据库和上传目录，不影响项目数据"""
+import os
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_temp_work_dir():
+    """创建临时工作目录并切换进去，设置DATABASE_URL，使项目目录可导入；必须在导入lM_share之前调用"""
+    work_dir = tempfile.mkdtemp(prefix='lm_share_bench_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(work_dir, 'files.db')
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.chdir(work_dir)
+    return work_dir
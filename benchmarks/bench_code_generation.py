@@ -0,0 +1,119 @@
+"""提取码生成与插入的延迟测试
+
+把提取码空间预先填充到10%、50%、90%，分别测量创建一条分享记录的耗时：
+  旧实现：每个候选码查询一次数据库，确认未被占用后再插入
+  插入重试：直接插入，唯一约束冲突时换一个码重试
+  候选池：一次IN查询批量筛选候选码，再插入
+为了能填满整个空间，提取码长度默认取3（36^3 = 46656个码），低于应用允许的最小长度。
+在临时目录中的独立SQLite数据库上运行，不影响项目数据。
+用法：python benchmarks/bench_code_generation.py [--length 3] [--creates 300]
+"""
+import argparse
+import itertools
+import random
+import secrets
+import time
+from datetime import datetime, timedelta
+
+from _env import use_temp_work_dir
+
+use_temp_work_dir()
+
+import lM_share  # noqa: E402
+from lM_share import app, db, File, set_configs  # noqa: E402
+
+OCCUPANCIES = [0.1, 0.5, 0.9]
+
+
+def legacy_create(length):
+    """旧实现：逐个查询候选码是否已被占用，确认后再插入"""
+    while True:
+        extract_code = lM_share.random_extract_code(length)
+        if not File.query.filter_by(extract_code=extract_code).first():
+            break
+    while True:
+        delete_code = secrets.token_urlsafe(12)
+        if not File.query.filter_by(delete_code=delete_code).first():
+            break
+    db.session.add(File(
+        original_filename='bench.txt',
+        filename_on_disk='bench',
+        extract_code=extract_code,
+        delete_code=delete_code,
+        expires_at=datetime.now() + timedelta(hours=1),
+        max_downloads=1
+    ))
+    db.session.commit()
+
+
+def new_create(length):
+    lM_share.create_file_record('bench', 'bench.txt', 0, 1, 1)
+
+
+def fill(length, occupancy, rng):
+    """清空表后随机占用指定比例的提取码"""
+    File.query.delete()
+    db.session.commit()
+    db.session.expunge_all()
+    space = [''.join(p) for p in itertools.product(lM_share.EXTRACT_CODE_ALPHABET, repeat=length)]
+    taken = rng.sample(space, int(len(space) * occupancy))
+    expires_at = datetime.now() + timedelta(hours=1)
+    db.session.bulk_insert_mappings(File, [{
+        'original_filename': 'fill.txt',
+        'filename_on_disk': 'fill',
+        'extract_code': code,
+        'delete_code': f'fill-{index}',
+        'expires_at': expires_at,
+        'max_downloads': 1
+    } for index, code in enumerate(taken)])
+    db.session.commit()
+    return len(space)
+
+
+def measure(create, length, creates):
+    """创建creates条记录，返回(平均ms, p99 ms)，之后删除这些记录以保持占用率不变"""
+    latencies = []
+    for _ in range(creates):
+        start = time.perf_counter()
+        create(length)
+        latencies.append((time.perf_counter() - start) * 1000)
+    File.query.filter(File.filename_on_disk == 'bench').delete()
+    db.session.commit()
+    db.session.expunge_all()
+    latencies.sort()
+    return sum(latencies) / len(latencies), latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--length', type=int, default=3)
+    parser.add_argument('--creates', type=int, default=300, help='每种情况下创建的记录数')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    # 仅用于测试：放宽最小长度，让提取码空间小到可以填满
+    lM_share.EXTRACT_CODE_MIN_LENGTH = min(args.length, lM_share.EXTRACT_CODE_MIN_LENGTH)
+
+    with app.app_context():
+        db.create_all()
+        lM_share.init_default_configs()
+
+        print(f"{'占用率':>6} {'实现':<10} {'平均(ms)':>10} {'p99(ms)':>10} {'冲突/次':>8}")
+        for occupancy in OCCUPANCIES:
+            space = fill(args.length, occupancy, rng)
+            for name, create, pool_size in [
+                ('旧实现', legacy_create, '0'),
+                ('插入重试', new_create, '0'),
+                ('候选池', new_create, '200'),
+            ]:
+                set_configs({'extract_code_length': str(args.length), 'code_pool_size': pool_size})
+                lM_share.code_pool['codes'].clear()
+                collisions = lM_share.code_stats['collisions']
+                mean, p99 = measure(create, args.length, args.creates)
+                collisions = (lM_share.code_stats['collisions'] - collisions) / args.creates
+                print(f"{occupancy:>6.0%} {name:<10} {mean:>10.2f} {p99:>10.2f} {collisions:>8.2f}")
+        print(f"提取码空间 {space} 个")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""下载计数并发测试
+
+多个线程同时对同一个提取码占用下载次数，检查成功次数与数据库中的计数
+都恰好等于max_downloads，并对比旧的"读取-加锁-加一-提交"实现的吞吐量。
+在临时目录中的独立SQLite数据库上运行，不影响项目数据。
+用法：python benchmarks/bench_download_counter.py [--threads 16] [--attempts 200]
+"""
+import argparse
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from _env import use_temp_work_dir
+
+use_temp_work_dir()
+
+import lM_share  # noqa: E402
+from lM_share import app, db, File  # noqa: E402
+
+
+def legacy_claim_download(file_id):
+    """旧实现：读取后with_for_update（SQLite会忽略）、在Python中加一再提交"""
+    file_record = File.query.filter_by(id=file_id).first()
+    if file_record.current_downloads >= file_record.max_downloads:
+        return False
+    locked_record = File.query.filter_by(id=file_id).with_for_update().first()
+    if locked_record.current_downloads >= locked_record.max_downloads:
+        return False
+    locked_record.current_downloads += 1
+    db.session.commit()
+    return True
+
+
+def create_share(max_downloads):
+    extract_code, delete_code = lM_share.generate_codes()
+    file_record = File(
+        original_filename='bench.bin',
+        filename_on_disk='bench',
+        extract_code=extract_code,
+        delete_code=delete_code,
+        expires_at=datetime.now() + timedelta(hours=1),
+        max_downloads=max_downloads
+    )
+    db.session.add(file_record)
+    db.session.commit()
+    return file_record.id
+
+
+def hammer(claim, threads, attempts, max_downloads):
+    """所有线程同时开始，每个线程尝试attempts次占用下载次数"""
+    with app.app_context():
+        file_id = create_share(max_downloads)
+
+    results = {'claimed': 0, 'rejected': 0, 'errors': 0}
+    results_lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        claimed = rejected = errors = 0
+        with app.app_context():
+            barrier.wait()
+            for _ in range(attempts):
+                try:
+                    if claim(file_id):
+                        claimed += 1
+                    else:
+                        rejected += 1
+                except Exception:
+                    db.session.rollback()
+                    errors += 1
+        with results_lock:
+            results['claimed'] += claimed
+            results['rejected'] += rejected
+            results['errors'] += errors
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        results['recorded'] = db.session.get(File, file_id).current_downloads
+    results['ops_per_sec'] = threads * attempts / elapsed
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=200, help='每个线程的尝试次数')
+    args = parser.parse_args()
+    # 下载上限设为总尝试次数的一半，既有成功也有被拒绝的请求
+    max_downloads = args.threads * args.attempts // 2
+
+    with app.app_context():
+        db.create_all()
+        lM_share.init_default_configs()
+
+    print(f"线程数 {args.threads}，每线程尝试 {args.attempts} 次，下载上限 {max_downloads}")
+    exact = True
+    for name, claim in [('旧实现', legacy_claim_download), ('条件UPDATE', lM_share.claim_download)]:
+        r = hammer(claim, args.threads, args.attempts, max_downloads)
+        ok = r['claimed'] == r['recorded'] == max_downloads
+        print(f"{name:>10}: 成功 {r['claimed']}，记录 {r['recorded']}，拒绝 {r['rejected']}，"
+              f"出错 {r['errors']}，{r['ops_per_sec']:.0f} 次/秒，计数{'准确' if ok else '不准确'}")
+        if claim is lM_share.claim_download:
+            exact = ok
+
+    sys.exit(0 if exact else 1)
+
+
+if __name__ == '__main__':
+    main()
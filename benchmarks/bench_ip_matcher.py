@@ -0,0 +1,88 @@
+"""IP访问控制匹配器的微基准测试
+
+对比逐条扫描规则（旧实现）与编译后的区间二分查找在不同规则数量下的单次查找耗时。
+用法：python benchmarks/bench_ip_matcher.py [--lookups 20000]
+"""
+import argparse
+import ipaddress
+import random
+import time
+
+# 在临时目录中的独立数据库上导入应用，不影响项目数据
+from _env import use_temp_work_dir
+
+use_temp_work_dir()
+
+from lM_share import IPRangeMatcher  # noqa: E402
+
+RULE_COUNTS = [10, 100, 1000, 10000, 100000]
+LINEAR_SCAN_MAX_RULES = 10000  # 逐条扫描在更多规则下太慢，不再测量
+
+
+def random_ranges(count, rng):
+    """生成随机的IPv4/IPv6 CIDR规则，约十分之一为IPv6"""
+    ranges = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            prefix = rng.choice([32, 48, 64])
+            address = ipaddress.IPv6Address(rng.getrandbits(128))
+            ranges.append(str(ipaddress.ip_network(f"{address}/{prefix}", strict=False)))
+        else:
+            prefix = rng.choice([16, 20, 24, 28, 32])
+            address = ipaddress.IPv4Address(rng.getrandbits(32))
+            ranges.append(str(ipaddress.ip_network(f"{address}/{prefix}", strict=False)))
+    return ranges
+
+
+def random_addresses(count, rng):
+    return [
+        ipaddress.IPv6Address(rng.getrandbits(128)) if rng.random() < 0.1
+        else ipaddress.IPv4Address(rng.getrandbits(32))
+        for _ in range(count)
+    ]
+
+
+def linear_scan(networks, ip_obj):
+    """旧实现：逐条检查每个网络"""
+    for network in networks:
+        if ip_obj in network:
+            return network
+    return None
+
+
+def time_lookups(lookup, addresses):
+    start = time.perf_counter()
+    for ip_obj in addresses:
+        lookup(ip_obj)
+    return (time.perf_counter() - start) / len(addresses) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lookups', type=int, default=20000, help='每种规则数量下的查找次数')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    addresses = random_addresses(args.lookups, rng)
+
+    print(f"{'规则数':>8} {'编译耗时(ms)':>14} {'区间查找(us)':>14} {'逐条扫描(us)':>14}")
+    for count in RULE_COUNTS:
+        ranges = random_ranges(count, rng)
+
+        start = time.perf_counter()
+        matcher = IPRangeMatcher(ranges)
+        build_ms = (time.perf_counter() - start) * 1000
+        matcher_us = time_lookups(matcher.match, addresses)
+
+        linear_us = '-'
+        if count <= LINEAR_SCAN_MAX_RULES:
+            networks = [ipaddress.ip_network(r, strict=False) for r in ranges]
+            sample = addresses[:max(100, args.lookups // (count // 10 + 1))]
+            linear_us = f"{time_lookups(lambda ip_obj: linear_scan(networks, ip_obj), sample):.2f}"
+
+        print(f"{count:>8} {build_ms:>14.1f} {matcher_us:>14.2f} {linear_us:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""孤立文件扫描测试
+
+在上传目录中放入N个文件（其中1%没有数据库记录），对比：
+  旧实现：平铺目录，os.listdir + 全部记录的文件名集合做差集
+  分片扫描：uploads/ab/cd/<文件名>，remove_orphaned_blobs逐个分片流式扫描，每批一次IN查询
+分别给出耗时和tracemalloc统计的内存峰值。
+在临时目录中的独立SQLite数据库上运行，不影响项目数据。
+用法：python benchmarks/bench_orphan_scan.py [--files 50000]
+"""
+import argparse
+import hashlib
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from _env import use_temp_work_dir
+
+WORK_DIR = use_temp_work_dir()
+
+import lM_share  # noqa: E402
+from lM_share import app, db, File  # noqa: E402
+
+
+def legacy_scan(upload_folder):
+    """旧实现：整个目录和全部记录各建一个集合"""
+    db_files = set(f.filename_on_disk for f in File.query.all())
+    disk_files = set(f for f in os.listdir(upload_folder) if not f.endswith('.part'))
+    return len(disk_files - db_files)
+
+
+def measure(scan, upload_folder):
+    tracemalloc.start()
+    start = time.perf_counter()
+    orphaned = scan(upload_folder)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.expunge_all()
+    return orphaned, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=50000)
+    args = parser.parse_args()
+
+    names = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(args.files)]
+    referenced = names[:args.files - args.files // 100]
+    flat_folder = os.path.join(WORK_DIR, 'flat')
+    sharded_folder = os.path.join(WORK_DIR, 'sharded')
+    os.makedirs(flat_folder)
+    # 孤立文件扫描跳过最近写入的文件，把修改时间设到保护期之前
+    old = time.time() - lM_share.BLOB_DELETE_GRACE.total_seconds() - 60
+    for name in names:
+        open(os.path.join(flat_folder, name), 'wb').close()
+        path = lM_share.blob_path(sharded_folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+        os.utime(path, (old, old))
+
+    with app.app_context():
+        db.create_all()
+        expires_at = datetime.now() + timedelta(hours=1)
+        db.session.bulk_insert_mappings(File, [{
+            'original_filename': 'bench.txt',
+            'filename_on_disk': name,
+            'extract_code': f'B{index}',
+            'delete_code': f'del-{index}',
+            'expires_at': expires_at,
+            'max_downloads': 1
+        } for index, name in enumerate(referenced)])
+        db.session.commit()
+
+        print(f"文件 {args.files}，其中孤立文件 {args.files - len(referenced)}")
+        print(f"{'实现':<10} {'找到孤立文件':>12} {'耗时(s)':>10} {'内存峰值(MB)':>14}")
+        for label, scan, folder in [
+            ('旧实现', legacy_scan, flat_folder),
+            ('分片扫描', lambda folder: lM_share.remove_orphaned_blobs(lM_share.LocalStorage(folder)), sharded_folder),
+        ]:
+            orphaned, elapsed, peak = measure(scan, folder)
+            print(f"{label:<10} {orphaned:>12} {elapsed:>10.2f} {peak / 1024 / 1024:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
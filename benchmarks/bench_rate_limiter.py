@@ -0,0 +1,48 @@
+"""限流器单次检查耗时测试
+
+测量进程内令牌桶在不同客户端数量下的单次acquire耗时（包括淘汰闲置桶），
+以及数据库共享后端的单次耗时。
+在临时目录中的独立SQLite数据库上运行，不影响项目数据。
+用法：python benchmarks/bench_rate_limiter.py [--calls 200000]
+"""
+import argparse
+import time
+
+from _env import use_temp_work_dir
+
+use_temp_work_dir()
+
+import lM_share  # noqa: E402
+from lM_share import app, db, TokenBucketLimiter  # noqa: E402
+
+CLIENT_COUNTS = [10, 10000, 200000]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+    rate, burst = 1.0, 20
+
+    print(f"{'客户端数':>10} {'进程内(us)':>12} {'保留的桶':>10} {'淘汰':>10}")
+    for clients in CLIENT_COUNTS:
+        limiter = TokenBucketLimiter()
+        keys = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(clients)]
+        start = time.perf_counter()
+        for i in range(args.calls):
+            limiter.acquire(keys[i % clients], rate, burst)
+        elapsed_us = (time.perf_counter() - start) / args.calls * 1e6
+        print(f"{clients:>10} {elapsed_us:>12.2f} {len(limiter.buckets):>10} {limiter.evicted:>10}")
+
+    with app.app_context():
+        db.create_all()
+        calls = min(args.calls, 5000)
+        start = time.perf_counter()
+        for i in range(calls):
+            lM_share.acquire_shared_token(f'10.0.{i % 100}.1', rate, burst)
+        elapsed_us = (time.perf_counter() - start) / calls * 1e6
+    print(f"数据库共享后端(SQLite): {elapsed_us:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
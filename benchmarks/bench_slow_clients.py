@@ -0,0 +1,163 @@
+"""慢速客户端并发容量测试
+
+模拟大量低速客户端同时下载同一个文件，对比：
+  同步模式：固定数量的工作线程，每个下载在整个传输期间占用一个线程（gunicorn同步工作进程的情况）
+  异步模式：asgi.py的桥接层，线程池大小相同，只在读取文件块时占用线程
+客户端的网速通过每发送一块后按字节数休眠来模拟，不需要真实网络和ASGI服务器。
+在临时目录中的独立数据库上运行，不影响项目数据。
+用法：python benchmarks/bench_slow_clients.py [--clients 500] [--threads 32] [--size-kb 256] [--rate-kb 256]
+"""
+import argparse
+import asyncio
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _env import use_temp_work_dir
+
+WORK_DIR = use_temp_work_dir()
+
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+import asgi  # noqa: E402
+from lM_share import app, set_config  # noqa: E402
+
+
+class Tracker:
+    """记录同时进行中的传输数、首字节时间和完成数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.first_byte = []
+        self.completed = 0
+        self.failed = 0
+
+    def started(self, waited):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.first_byte.append(waited)
+
+    def finished(self, ok):
+        with self.lock:
+            self.active -= 1
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_sync(code, args):
+    """同步模式：每个客户端占用一个工作线程直到传输完成"""
+    tracker = Tracker()
+    rate = args.rate_kb * 1024
+
+    def client(queued_at):
+        environ = EnvironBuilder(path=f'/d/{code}').get_environ()
+        status = {}
+
+        def start_response(s, headers, exc_info=None):
+            status['code'] = int(s.split(' ', 1)[0])
+
+        iterable = app(environ, start_response)
+        tracker.started(time.perf_counter() - queued_at)
+        try:
+            for chunk in iterable:
+                time.sleep(len(chunk) / rate)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        tracker.finished(status.get('code') == 200)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for _ in range(args.clients):
+            pool.submit(client, time.perf_counter())
+    return time.perf_counter() - start, tracker
+
+
+def run_async(code, args):
+    """异步模式：连接由事件循环持有，线程池只用于读文件块和访问数据库"""
+    tracker = Tracker()
+    rate = args.rate_kb * 1024
+    bridge = asgi.AsyncWSGIBridge(app, threads=args.threads)
+
+    async def client(done):
+        queued_at = time.perf_counter()
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': f'/d/{code}', 'root_path': '',
+            'query_string': b'', 'headers': [], 'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 5000), 'scheme': 'http', 'http_version': '1.1'
+        }
+        status = {}
+        received = {'request': False}
+
+        async def receive():
+            if not received['request']:
+                received['request'] = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                tracker.started(time.perf_counter() - queued_at)
+            elif message.get('body'):
+                await asyncio.sleep(len(message['body']) / rate)
+
+        await bridge(scope, receive, send)
+        tracker.finished(status.get('code') == 200)
+
+    async def main():
+        done = asyncio.Event()
+        await asyncio.gather(*(client(done) for _ in range(args.clients)))
+        done.set()
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    bridge.executor.shutdown()
+    return time.perf_counter() - start, tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=32, help='同步模式的工作线程数，也是异步模式的线程池大小')
+    parser.add_argument('--size-kb', type=int, default=256, help='下载文件大小')
+    parser.add_argument('--rate-kb', type=int, default=256, help='每个客户端的下载速度（KB/s）')
+    args = parser.parse_args()
+
+    # send_from_directory按应用根目录解析相对路径，这里使用临时目录中的绝对路径
+    with app.app_context():
+        set_config('upload_folder', os.path.join(WORK_DIR, 'uploads'))
+
+    client = app.test_client()
+    data = os.urandom(args.size_kb * 1024)
+    code = client.post('/upload', data={
+        'file': (io.BytesIO(data), 'bench.zip'),
+        'max_downloads': str(args.clients * 4)
+    }, content_type='multipart/form-data').get_json()['extract_code']
+
+    transfer_seconds = args.size_kb / args.rate_kb
+    print(f"客户端 {args.clients}，线程 {args.threads}，文件 {args.size_kb}KB，"
+          f"单个客户端 {args.rate_kb}KB/s（单次传输约 {transfer_seconds:.1f} 秒）")
+    print(f"{'模式':<6} {'总耗时(s)':>10} {'最大并发传输':>12} {'首字节p50(s)':>12} {'首字节p99(s)':>12} {'完成':>6} {'失败':>6}")
+    for name, run in [('同步', run_sync), ('异步', run_async)]:
+        elapsed, tracker = run(code, args)
+        print(f"{name:<6} {elapsed:>10.1f} {tracker.max_active:>12} "
+              f"{percentile(tracker.first_byte, 0.5):>12.2f} {percentile(tracker.first_byte, 0.99):>12.2f} "
+              f"{tracker.completed:>6} {tracker.failed:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""SQLite并发读写负载测试
+
+若干线程持续请求/file-info（读），另一组线程在中途持续上传小文件（写），
+分别统计写入前后的读吞吐量、p99延迟和出错次数。
+对比旧的默认设置（DELETE日志、synchronous=FULL）与WAL + synchronous=NORMAL。
+每种设置在临时目录中单独起一个子进程运行，不影响项目数据。
+用法：python benchmarks/bench_sqlite_load.py [--readers 8] [--writers 4] [--seconds 5]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from _env import use_temp_work_dir
+
+MODES = [
+    ('旧设置 DELETE/FULL', {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT': '5000'}),
+    ('WAL/NORMAL', {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL'}),
+]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_worker(args):
+    """在子进程中运行：导入应用并施加负载，结果以JSON输出到stdout"""
+    use_temp_work_dir()
+
+    import lM_share
+    from lM_share import app, db
+
+    with app.app_context():
+        db.create_all()
+        lM_share.init_default_configs()
+
+    seed = app.test_client().post('/upload', data={'file': (io.BytesIO(b'seed'), 'seed.txt')},
+                                  content_type='multipart/form-data').get_json()
+    code = seed['extract_code']
+
+    stop = threading.Event()
+    writing = threading.Event()
+    lock = threading.Lock()
+    reads = {'quiet': [], 'burst': []}
+    result = {'read_errors': 0, 'writes': 0, 'write_errors': 0}
+
+    def reader():
+        client = app.test_client()
+        while not stop.is_set():
+            phase = 'burst' if writing.is_set() else 'quiet'
+            start = time.perf_counter()
+            response = client.get(f'/file-info/{code}')
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    reads[phase].append(elapsed)
+                else:
+                    result['read_errors'] += 1
+
+    def writer(index):
+        client = app.test_client()
+        writing.wait()
+        count = 0
+        while not stop.is_set():
+            data = f'{index}-{count}-{time.time()}'.encode()
+            response = client.post('/upload', data={'file': (io.BytesIO(data), 'w.txt')},
+                                   content_type='multipart/form-data')
+            count += 1
+            with lock:
+                if response.status_code == 200:
+                    result['writes'] += 1
+                else:
+                    result['write_errors'] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    writing.set()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    for phase, samples in reads.items():
+        result[f'{phase}_reads_per_sec'] = len(samples) / args.seconds
+        result[f'{phase}_p99_ms'] = percentile(samples, 0.99) * 1000
+    result['writes_per_sec'] = result['writes'] / args.seconds
+    with app.app_context():
+        result['journal_mode'] = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+    print(json.dumps(result))
+    sys.stdout.flush()
+    # 后台清理线程不会自行退出
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5, help='写入前、写入中各持续的秒数')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"读线程 {args.readers}，写线程 {args.writers}，每阶段 {args.seconds} 秒")
+    print(f"{'设置':<20} {'只读 次/秒':>10} {'写入中 次/秒':>12} {'只读p99(ms)':>12} "
+          f"{'写入中p99(ms)':>14} {'写入 次/秒':>10} {'读出错':>6} {'写出错':>6}")
+    for name, env in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker',
+             '--readers', str(args.readers), '--writers', str(args.writers), '--seconds', str(args.seconds)],
+            env=dict(os.environ, **env), capture_output=True, text=True, check=True
+        ).stdout
+        # 应用自身的日志也输出到stdout，结果是最后一行JSON
+        r = json.loads([line for line in output.splitlines() if line.startswith('{')][-1])
+        print(f"{name:<20} {r['quiet_reads_per_sec']:>10.0f} {r['burst_reads_per_sec']:>12.0f} "
+              f"{r['quiet_p99_ms']:>12.1f} {r['burst_p99_ms']:>14.1f} {r['writes_per_sec']:>10.0f} "
+              f"{r['read_errors']:>6} {r['write_errors']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,475 @@
+"""传输接口基准测试套件
+
+在本机启动应用（子进程中的多线程WSGI服务器，独立的临时数据库和上传目录），用多个并发客户端
+通过HTTP依次测量：
+  upload     上传吞吐量（按文件大小分布随机选择，每个文件内容不同，不会被内容寻址存储去重）
+  download   下载吞吐量和p50/p99延迟（延迟计到收完最后一个字节）
+  file_info  /file-info查询速率和p50/p99延迟
+  cleanup    定期清理删除N条已过期记录的耗时（每个规模单独一个子进程，直接调用清理函数；
+             记录引用的存储文件不存在，测量的是数据库和存储检查的开销，不含删除文件本身）
+结果以JSON写入--output，并与基准结果（默认benchmarks/baseline.json）比较，
+任一指标比基准差超过--tolerance时列出并以退出码1结束。基准与机器有关，换机器后先用--save-baseline重新生成；
+基准只能在没有未提交修改的工作区中保存，结果中记录提交、主机名、CPU型号和核数，--note可附加说明。
+用法：python benchmarks/bench_suite.py [--concurrency 8] [--seconds 10] [--sizes 4k:60,256k:30,4m:10]
+      [--cleanup-rows 10000,100000,1000000] [--only upload,download] [--url http://127.0.0.1:8000]
+      [--output bench_results.json] [--baseline benchmarks/baseline.json] [--save-baseline [--note 说明]]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from _env import use_temp_work_dir
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+PHASES = ('upload', 'download', 'file_info', 'cleanup')
+SIZE_UNITS = {'k': 1024, 'm': 1024 * 1024}
+# 下载阶段每种大小预先上传的文件数
+DOWNLOAD_FILES_PER_SIZE = 4
+# 清理阶段每次批量插入的记录数
+CLEANUP_INSERT_BATCH = 50000
+SERVER_READY = 'BENCH_SERVER_READY'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def parse_sizes(text):
+    """'4k:60,256k:30,4m:10' -> [(4096, 60), (262144, 30), (4194304, 10)]"""
+    sizes = []
+    for item in text.split(','):
+        size, _, weight = item.strip().partition(':')
+        unit = SIZE_UNITS.get(size[-1:].lower(), 1)
+        number = size[:-1] if unit > 1 else size
+        sizes.append((int(float(number) * unit), int(weight or 1)))
+    return sizes
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:g}MB"
+    if size >= 1024:
+        return f"{size / 1024:g}KB"
+    return f"{size}B"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cpu_model():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def host_info():
+    """基准与机器有关，记录测量所在的主机"""
+    return {
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'cpu_model': cpu_model(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def last_json_line(output):
+    # 应用自身的日志也输出到stdout，结果是最后一行JSON
+    return json.loads([line for line in output.splitlines() if line.startswith('{')][-1])
+
+
+def use_temp_database():
+    """在临时目录中使用独立的数据库和上传目录，导入应用"""
+    use_temp_work_dir()
+    import lM_share
+    return lM_share
+
+
+def run_server(args):
+    """子进程：初始化应用并运行多线程WSGI服务器，就绪后在stdout输出一行JSON"""
+    lM_share = use_temp_database()
+    from werkzeug.serving import make_server
+
+    app = lM_share.create_app()
+    max_size = max(size for size, _ in parse_sizes(args.sizes))
+    with app.app_context():
+        # 基准测试的客户端都来自本机，关闭限流；只允许.bin文件
+        lM_share.set_configs({
+            'max_upload_size': str(max_size // (1024 * 1024) + 1),
+            'allowed_extensions': 'bin',
+            'rate_limit_enabled': 'false',
+        })
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    sys.stdout.write(SERVER_READY + '\n')
+    sys.stdout.flush()
+    server.serve_forever()
+
+
+def run_cleanup_worker(args):
+    """子进程：插入rows条已过期记录，测量清理全部记录的耗时"""
+    lM_share = use_temp_database()
+    from lM_share import app, db, File
+
+    rows = args.cleanup_worker
+    with app.app_context():
+        db.create_all()
+        lM_share.init_default_configs()
+        # 逐条的清理日志会占满输出，只保留警告
+        lM_share.set_configs({'log_levels': 'cleanup=warning'})
+        expires_at = datetime.now() - timedelta(minutes=1)
+        for start in range(0, rows, CLEANUP_INSERT_BATCH):
+            db.session.bulk_insert_mappings(File, [{
+                'original_filename': 'bench.bin',
+                'filename_on_disk': f'{index:064x}',
+                'extract_code': f'C{index}',
+                'delete_code': f'del-{index}',
+                'expires_at': expires_at,
+                'max_downloads': 1
+            } for index in range(start, min(start + CLEANUP_INSERT_BATCH, rows))])
+            db.session.commit()
+        db.session.expunge_all()
+
+        storage = lM_share.get_storage()
+        removed = 0
+        started = time.perf_counter()
+        while True:
+            batch_removed, backlog = lM_share.cleanup_due_files(datetime.now(), storage)
+            removed += batch_removed
+            if not backlog:
+                break
+        elapsed = time.perf_counter() - started
+
+    print(json.dumps({'removed': removed, 'seconds': elapsed}))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+class Target:
+    """被测服务器的地址，每个请求使用一个新连接"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+
+    def request(self, method, path, body=None, headers=None):
+        """返回(状态码, 响应字节数, 响应内容)；响应内容只保留前64KB，下载大文件时不占用内存"""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            head = response.read(64 * 1024)
+            size = len(head)
+            while True:
+                chunk = response.read(256 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+            return response.status, size, head
+        finally:
+            conn.close()
+
+    def upload(self, size, payload, max_downloads=1):
+        """上传一个内容唯一的文件，返回(状态码, 请求字节数, 提取码)"""
+        boundary = uuid.uuid4().hex
+        unique = uuid.uuid4().bytes
+        body = b''.join([
+            f'--{boundary}\r\nContent-Disposition: form-data; name="max_downloads"\r\n\r\n{max_downloads}\r\n'.encode(),
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="bench.bin"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode(),
+            unique, payload[:size - len(unique)],
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ])
+        status, _, head = self.request('POST', '/upload', body, {
+            'Content-Type': f'multipart/form-data; boundary={boundary}',
+            'Content-Length': str(len(body)),
+        })
+        code = json.loads(head).get('extract_code') if status == 200 else None
+        return status, size, code
+
+
+def run_load(seconds, concurrency, action):
+    """concurrency个线程在seconds秒内反复执行action()，action返回(是否成功, 传输字节数)"""
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    latencies = []
+    totals = {'errors': 0, 'bytes': 0}
+
+    def worker(index):
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                ok, transferred = action(rng)
+            except OSError:
+                ok, transferred = False, 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                    totals['bytes'] += transferred
+                else:
+                    totals['errors'] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests_per_sec': len(latencies) / elapsed,
+        'mb_per_sec': totals['bytes'] / elapsed / 1024 / 1024,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': totals['errors'],
+    }
+
+
+def weighted_size(rng, sizes):
+    return rng.choices([size for size, _ in sizes], weights=[weight for _, weight in sizes])[0]
+
+
+def bench_upload(target, args, sizes, payload):
+    def action(rng):
+        status, size, _ = target.upload(weighted_size(rng, sizes), payload)
+        return status == 200, size
+    return run_load(args.seconds, args.concurrency, action)
+
+
+def bench_download(target, args, sizes, payload):
+    codes = {}
+    for size, _ in sizes:
+        codes[size] = []
+        for _ in range(DOWNLOAD_FILES_PER_SIZE):
+            status, _, code = target.upload(size, payload, max_downloads=10 ** 9)
+            if status != 200:
+                raise RuntimeError(f'准备下载文件失败: HTTP {status}')
+            codes[size].append(code)
+
+    def action(rng):
+        code = rng.choice(codes[weighted_size(rng, sizes)])
+        status, received, _ = target.request('GET', f'/d/{code}')
+        return status == 200, received
+    return run_load(args.seconds, args.concurrency, action)
+
+
+def bench_file_info(target, args, payload):
+    status, _, code = target.upload(4096, payload)
+    if status != 200:
+        raise RuntimeError(f'准备查询的文件失败: HTTP {status}')
+
+    def action(rng):
+        status, received, _ = target.request('GET', f'/file-info/{code}')
+        return status == 200, received
+    result = run_load(args.seconds, args.concurrency, action)
+    del result['mb_per_sec']
+    return result
+
+
+def bench_cleanup(rows):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--cleanup-worker', str(rows)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    result = last_json_line(output)
+    return {'seconds': result['seconds'], 'rows_per_sec': result['removed'] / result['seconds']}
+
+
+def start_server(args):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port), '--sizes', args.sizes],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    # 服务器的日志也输出到stdout，就绪标记之后的输出全部丢弃
+    for line in process.stdout:
+        if SERVER_READY in line:
+            break
+    else:
+        raise RuntimeError('服务器启动失败')
+    threading.Thread(target=lambda: [None for _ in process.stdout], daemon=True).start()
+    return process, f'http://127.0.0.1:{port}'
+
+
+def flatten(results):
+    """{'upload': {'p99_ms': 1}} -> {'upload.p99_ms': 1}"""
+    flat = {}
+    for phase, values in results.items():
+        for name, value in values.items():
+            if isinstance(value, dict):
+                for sub_name, sub_value in value.items():
+                    flat[f'{phase}.{name}.{sub_name}'] = sub_value
+            else:
+                flat[f'{phase}.{name}'] = value
+    return flat
+
+
+def compare(current, baseline, tolerance):
+    """返回比基准差超过tolerance的指标列表：(指标, 基准值, 当前值, 变化比例)"""
+    regressions = []
+    current_flat = flatten(current['results'])
+    baseline_flat = flatten(baseline['results'])
+    for metric, base in baseline_flat.items():
+        value = current_flat.get(metric)
+        if value is None or not base or metric.endswith('.errors'):
+            continue
+        # 速率越高越好，延迟和耗时越低越好
+        change = (value - base) / base
+        if (change < -tolerance) if metric.endswith('_per_sec') else (change > tolerance):
+            regressions.append((metric, base, value, change))
+    # 出错数从0变为非0也算退化
+    for metric, value in current_flat.items():
+        if metric.endswith('.errors') and value and not baseline_flat.get(metric):
+            regressions.append((metric, 0, value, float('inf')))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=8, help='并发客户端数')
+    parser.add_argument('--seconds', type=float, default=10, help='上传、下载、查询各持续的秒数')
+    parser.add_argument('--sizes', default='4k:60,256k:30,4m:10', help='文件大小分布，大小:权重')
+    parser.add_argument('--cleanup-rows', default='10000,100000,1000000', help='清理测试的记录数')
+    parser.add_argument('--only', default=','.join(PHASES), help='只运行这些阶段')
+    parser.add_argument('--url', help='测试已经运行的服务器（如gunicorn），需自行关闭限流并允许.bin文件')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基准')
+    parser.add_argument('--note', help='保存基准时附加的说明，如测量所用的机器')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许比基准差的比例')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--cleanup-worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        run_server(args)
+        return
+    if args.cleanup_worker:
+        run_cleanup_worker(args)
+        return
+
+    # 基准必须对应一个确定的提交，有未提交的修改时不保存
+    commit = git_commit()
+    if args.save_baseline and (commit is None or commit.endswith('-dirty')):
+        print(f"工作区有未提交的修改（{commit}），提交后再保存基准")
+        sys.exit(2)
+
+    phases = [phase.strip() for phase in args.only.split(',') if phase.strip() in PHASES]
+    sizes = parse_sizes(args.sizes)
+    payload = os.urandom(max(size for size, _ in sizes))
+    results = {}
+
+    process = None
+    if {'upload', 'download', 'file_info'} & set(phases):
+        if args.url:
+            target = Target(args.url)
+        else:
+            process, url = start_server(args)
+            target = Target(url)
+        try:
+            print(f"并发 {args.concurrency}，每阶段 {args.seconds} 秒，文件大小分布 "
+                  + ', '.join(f"{format_size(size)}×{weight}" for size, weight in sizes))
+            print(f"{'阶段':<10} {'次/秒':>10} {'MB/秒':>10} {'p50(ms)':>10} {'p99(ms)':>10} {'出错':>6}")
+            for phase in ('upload', 'download', 'file_info'):
+                if phase not in phases:
+                    continue
+                if phase == 'upload':
+                    r = bench_upload(target, args, sizes, payload)
+                elif phase == 'download':
+                    r = bench_download(target, args, sizes, payload)
+                else:
+                    r = bench_file_info(target, args, payload)
+                results[phase] = r
+                mb_per_sec = f"{r['mb_per_sec']:>10.1f}" if 'mb_per_sec' in r else f"{'-':>10}"
+                print(f"{phase:<10} {r['requests_per_sec']:>10.1f} {mb_per_sec} "
+                      f"{r['p50_ms']:>10.1f} {r['p99_ms']:>10.1f} {r['errors']:>6}")
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if 'cleanup' in phases:
+        results['cleanup'] = {}
+        print(f"{'清理记录数':>10} {'耗时(s)':>10} {'条/秒':>10}")
+        for rows in [int(r) for r in args.cleanup_rows.split(',') if r.strip()]:
+            r = bench_cleanup(rows)
+            results['cleanup'][str(rows)] = r
+            print(f"{rows:>10} {r['seconds']:>10.2f} {r['rows_per_sec']:>10.0f}")
+
+    report = {
+        'meta': {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': platform.python_version(),
+            'host': host_info(),
+            'target': args.url or 'local',
+            'params': {'concurrency': args.concurrency, 'seconds': args.seconds, 'sizes': args.sizes},
+            'note': args.note,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"结果已写入 {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"已保存为基准 {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("没有基准结果，使用 --save-baseline 保存本次结果作为基准")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['meta'].get('params') != report['meta']['params']:
+        print(f"注意：基准的测试参数不同 {baseline['meta'].get('params')}，比较结果仅供参考")
+    baseline_host = baseline['meta'].get('host') or {}
+    current_host = report['meta']['host']
+    if (baseline_host.get('cpu_model'), baseline_host.get('cpus')) != (current_host['cpu_model'], current_host['cpus']):
+        print(f"注意：基准在另一台机器上测量 {baseline_host}，比较结果仅供参考")
+    regressions = compare(report, baseline, args.tolerance)
+    if not regressions:
+        print(f"与基准（{baseline['meta'].get('commit')}）相比没有超过 {args.tolerance:.0%} 的退化")
+        return
+    print(f"与基准（{baseline['meta'].get('commit')}）相比退化超过 {args.tolerance:.0%} 的指标：")
+    for metric, base, value, change in regressions:
+        print(f"  {metric:<36} {base:>12.2f} -> {value:>12.2f} ({change:+.0%})")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
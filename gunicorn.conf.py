@@ -0,0 +1,15 @@
+"""gunicorn配置：在当前目录运行gunicorn时自动加载
+
+gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+gunicorn --preload -w 4 -b 0.0.0.0:5000 wsgi:app
+
+--preload 时应用在主进程中初始化，线程不会随fork复制到工作进程，
+因此每个工作进程在fork之后启动自己的后台维护线程，而不是等到收到第一个请求。
+"""
+
+
+def post_fork(server, worker):
+    # 未使用--preload时此时应用尚未加载，create_app可重复调用，先完成初始化
+    from lM_share import create_app, start_background_scheduler
+    create_app()
+    start_background_scheduler()
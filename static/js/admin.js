@@ -72,8 +72,13 @@ function saveSettings() {
     const settings = {};
     const fields = [
         'site_title', 'site_subtitle', 'logo_url', 'header_text', 'footer_text',
-        'max_upload_size', 'allowed_extensions', 'upload_folder',
-        'max_downloads', 'max_expire_hours', 'admin_password'
+        'max_upload_size', 'allowed_extensions', 'upload_folder', 'instant_upload_enabled',
+        'compression_codec', 'compression_skip_extensions',
+        'max_downloads', 'extract_code_length', 'code_pool_size', 'max_expire_hours',
+        'rate_limit_enabled', 'rate_limit_per_minute', 'rate_limit_burst', 'rate_limit_backend',
+        'download_offload', 'download_offload_prefix',
+        'log_level', 'log_levels', 'log_sample_rate', 'profile_enabled', 'profile_slow_ms',
+        'admin_password'
     ];
     
     fields.forEach(field => {
@@ -134,7 +139,14 @@ document.getElementById('active-files').textContent = data.active_files;
 document.getElementById('expired-files').textContent = data.expired_files;
 document.getElementById('limit-reached-files').textContent = data.limit_reached_files;
 document.getElementById('total-size').textContent = data.total_size;
+document.getElementById('shared-size').textContent = data.shared_size;
+document.getElementById('compression-ratio').textContent = data.compression_ratio === null ? '-' : (data.compression_ratio * 100).toFixed(1) + '%';
+document.getElementById('compression-saved').textContent = data.compression_saved;
 document.getElementById('upload-folder').textContent = data.upload_folder;
+if (data.cleanup) {
+document.getElementById('cleanup-last-run').textContent = data.cleanup.last_run_at ? new Date(data.cleanup.last_run_at).toLocaleString() : '-';
+document.getElementById('cleanup-backlog').textContent = data.cleanup.backlog;
+}
 })
 .catch(error => {
 console.error('获取统计信息失败:', error);
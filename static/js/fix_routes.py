@@ -7,6 +7,8 @@ cursor = conn.cursor()
 # 重置IP配置，确保装饰器不会拦截
 cursor.execute("UPDATE site_config SET value = 'false' WHERE key = 'ip_access_enabled'")
 cursor.execute("UPDATE site_config SET value = 'allow' WHERE key = 'default_access_policy'")
+# 递增配置版本号，让运行中的服务重新加载配置缓存
+cursor.execute("UPDATE site_config SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = 'config_version'")
 
 conn.commit()
 conn.close()
@@ -1,5 +1,7 @@
 let uploadHistory = JSON.parse(localStorage.getItem('uploadHistory') || '[]');
 let downloadHistory = JSON.parse(localStorage.getItem('downloadHistory') || '[]');
+// 上传记录的文件状态（提取码 -> 状态），每次打开历史页面时重新查询
+let uploadStatus = {};
 let uploadDisplayedCount = 5;
 let downloadDisplayedCount = 5;
 let uploadLoading = false;
@@ -80,72 +82,241 @@ function showPage(page) {
     }
 }
 
-function handleFileUpload(event) {
-    const file = event.target.files[0];
-    if (!file) return;
+// 分块上传：超过阈值的文件分块并行上传，断线后只需重传缺失的分块
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const CHUNK_CONCURRENCY = 4;
+const CHUNK_MAX_RETRIES = 3;
 
-    // 使用动态配置进行前端验证
+// 解析上传相关接口的响应，失败时抛出带服务器错误信息的异常
+async function parseUploadResponse(response) {
+    if (!response.ok) {
+        let errorMessage = `上传失败 (${response.status})`;
+        
+        try {
+            const contentType = response.headers.get('content-type');
+            if (contentType && contentType.includes('application/json')) {
+                const errorData = await response.json();
+                errorMessage = errorData.error || errorMessage;
+            } else {
+                const errorText = await response.text();
+                if (errorText.includes('413') || response.status === 413) {
+                    errorMessage = `文件大小超过限制（最大 ${systemConfig.max_upload_size}MB）`;
+                }
+            }
+        } catch (e) {
+            console.warn('无法解析错误响应:', e);
+        }
+        
+        throw new Error(errorMessage);
+    }
+    
+    try {
+        return await response.json();
+    } catch (e) {
+        throw new Error('服务器响应格式错误');
+    }
+}
+
+function uploadWholeFile(file, maxDownloads, expireHours) {
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('max_downloads', maxDownloads);
+    formData.append('expire_hours', expireHours);
+
+    return fetch('/upload', {
+        method: 'POST',
+        body: formData
+    }).then(parseUploadResponse);
+}
+
+// 多文件分享：多个文件共用一个提取码，按数量和总大小分批提交，第一批创建分享，之后的批次追加到该分享
+const SHARE_BATCH_FILES = 200;
+
+function shareBatches(files) {
+    const maxSizeBytes = systemConfig.max_upload_size * 1024 * 1024;
+    const batches = [];
+    let batch = [];
+    let batchSize = 0;
+    for (const file of files) {
+        if (batch.length > 0 && (batch.length >= SHARE_BATCH_FILES || batchSize + file.size > maxSizeBytes)) {
+            batches.push(batch);
+            batch = [];
+            batchSize = 0;
+        }
+        batch.push(file);
+        batchSize += file.size;
+    }
+    if (batch.length > 0) batches.push(batch);
+    return batches;
+}
+
+async function uploadShareFiles(files, maxDownloads, expireHours) {
+    let data = null;
+    for (const batch of shareBatches(files)) {
+        const formData = new FormData();
+        batch.forEach(file => {
+            // 文件夹上传时保留相对路径，作为压缩包内的路径
+            formData.append('file', file, file.webkitRelativePath || file.name);
+        });
+        formData.append('max_downloads', maxDownloads);
+        formData.append('expire_hours', expireHours);
+        if (data) formData.append('append_to', data.delete_code);
+
+        data = await fetch('/upload', {
+            method: 'POST',
+            body: formData
+        }).then(parseUploadResponse);
+    }
+    return data;
+}
+
+// 前端校验单个文件，通过时返回null
+function validateUploadFile(file) {
     const maxSizeMB = systemConfig.max_upload_size;
-    const maxSizeBytes = maxSizeMB * 1024 * 1024;
-    if (file.size > maxSizeBytes) {
-        showError(`文件大小超过限制（最大 ${maxSizeMB}MB）`);
-        event.target.value = '';
-        return;
+    if (file.size > maxSizeMB * 1024 * 1024) {
+        return `文件大小超过限制（最大 ${maxSizeMB}MB）`;
     }
 
-    // 检查文件扩展名
     const allowedExtensions = systemConfig.allowed_extensions.split(',');
     const fileExtension = file.name.split('.').pop().toLowerCase();
     if (allowedExtensions.length > 0 && !allowedExtensions.includes(fileExtension)) {
-        showError(`不支持的文件类型：${fileExtension}，支持的类型：${allowedExtensions.join(', ')}`);
-        event.target.value = '';
-        return;
+        return `不支持的文件类型：${fileExtension}，支持的类型：${allowedExtensions.join(', ')}`;
     }
+    return null;
+}
 
-    const formData = new FormData();
-    formData.append('file', file);
-    formData.append('max_downloads', Math.min(
-        parseInt(document.getElementById('max_downloads').value) || 1, 
-        systemConfig.max_downloads
-    ));
-    formData.append('expire_hours', Math.min(
-        parseInt(document.getElementById('expire_hours').value) || 24, 
-        systemConfig.max_expire_hours
-    ));
+function uploadSessionKey(file) {
+    return `uploadSession:${file.name}:${file.size}:${file.lastModified}`;
+}
 
-    fetch('/upload', {
-        method: 'POST',
-        body: formData
-    })
-    .then(async response => {
-        // 检查响应状态
-        if (!response.ok) {
-            let errorMessage = `上传失败 (${response.status})`;
-            
-            try {
-                const contentType = response.headers.get('content-type');
-                if (contentType && contentType.includes('application/json')) {
-                    const errorData = await response.json();
-                    errorMessage = errorData.error || errorMessage;
-                } else {
-                    const errorText = await response.text();
-                    if (errorText.includes('413') || response.status === 413) {
-                        errorMessage = `文件大小超过限制（最大 ${systemConfig.max_upload_size}MB）`;
-                    }
-                }
-            } catch (e) {
-                console.warn('无法解析错误响应:', e);
-            }
-            
-            throw new Error(errorMessage);
+async function uploadInChunks(file, maxDownloads, expireHours) {
+    // 同一文件之前中断的上传会话，可以从服务器已收到的分块继续
+    const sessionKey = uploadSessionKey(file);
+    let session = null;
+    const savedUploadId = localStorage.getItem(sessionKey);
+    if (savedUploadId) {
+        const response = await fetch(`/upload/${savedUploadId}`);
+        if (response.ok) {
+            session = await response.json();
+        } else {
+            localStorage.removeItem(sessionKey);
         }
-        
+    }
+    
+    if (!session) {
+        session = await fetch('/upload/init', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                filename: file.name,
+                size: file.size,
+                max_downloads: maxDownloads,
+                expire_hours: expireHours
+            })
+        }).then(parseUploadResponse);
+        localStorage.setItem(sessionKey, session.upload_id);
+    }
+    
+    // 多个并发工作者从队列中领取缺失的分块
+    const received = new Set(session.received_chunks);
+    const pending = [];
+    for (let i = 0; i < session.total_chunks; i++) {
+        if (!received.has(i)) {
+            pending.push(i);
+        }
+    }
+    
+    async function worker() {
+        while (pending.length > 0) {
+            await sendChunk(file, session, pending.shift());
+        }
+    }
+    
+    const workers = [];
+    for (let i = 0; i < Math.min(CHUNK_CONCURRENCY, pending.length); i++) {
+        workers.push(worker());
+    }
+    await Promise.all(workers);
+    
+    const data = await fetch(`/upload/${session.upload_id}/complete`, {
+        method: 'POST'
+    }).then(parseUploadResponse);
+    localStorage.removeItem(sessionKey);
+    return data;
+}
+
+async function sendChunk(file, session, index) {
+    const start = index * session.chunk_size;
+    const chunk = file.slice(start, Math.min(start + session.chunk_size, file.size));
+    
+    for (let attempt = 1; ; attempt++) {
+        let response = null;
         try {
-            return await response.json();
+            response = await fetch(`/upload/${session.upload_id}/chunk/${index}`, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/octet-stream'
+                },
+                body: chunk
+            });
         } catch (e) {
-            throw new Error('服务器响应格式错误');
+            // 网络错误，稍后重试该分块
+            if (attempt >= CHUNK_MAX_RETRIES) {
+                throw e;
+            }
         }
-    })
+        
+        if (response) {
+            if (response.ok) {
+                return;
+            }
+            // 客户端错误不重试，服务器错误重试到上限
+            if (response.status < 500 || attempt >= CHUNK_MAX_RETRIES) {
+                await parseUploadResponse(response);
+            }
+        }
+        
+        await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+    }
+}
+
+function handleFileUpload(event) {
+    const files = Array.from(event.target.files || []);
+    const file = files[0];
+    if (!file) return;
+
+    // 使用动态配置进行前端验证
+    for (const item of files) {
+        const error = validateUploadFile(item);
+        if (error) {
+            showError(files.length > 1 ? `${item.name}: ${error}` : error);
+            event.target.value = '';
+            return;
+        }
+    }
+
+    const maxDownloads = Math.min(
+        parseInt(document.getElementById('max_downloads').value) || 1, 
+        systemConfig.max_downloads
+    );
+    const expireHours = Math.min(
+        parseInt(document.getElementById('expire_hours').value) || 24, 
+        systemConfig.max_expire_hours
+    );
+
+    // 多个文件作为一个分享上传；单个大文件走分块上传，小文件一次性上传
+    let uploadPromise;
+    if (files.length > 1) {
+        uploadPromise = uploadShareFiles(files, maxDownloads, expireHours);
+    } else if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+        uploadPromise = uploadInChunks(file, maxDownloads, expireHours);
+    } else {
+        uploadPromise = uploadWholeFile(file, maxDownloads, expireHours);
+    }
+
+    uploadPromise
     .then(data => {
         if (data.success) {
             // 设置提取码和删除码
@@ -331,6 +502,7 @@ function handleReceive() {
 }
 
 function updateHistoryPage() {
+    uploadStatus = {};
     updateUploadHistory();
     updateDownloadHistory();
 }
@@ -356,6 +528,7 @@ function updateUploadHistory() {
             <div class="history-item">
                 <div class="history-filename">${item.filename}</div>
                 <div class="history-time">${item.time}</div>
+                <div class="history-status" data-code="${item.extractCode}">${formatUploadStatus(uploadStatus[item.extractCode])}</div>
                 <div class="history-actions">
                     <div class="copyable-code" onclick="copyHistoryCode('${item.extractCode}', '提取码')">
                         提取码: ${item.extractCode}
@@ -371,6 +544,7 @@ function updateUploadHistory() {
     });
     
     content.innerHTML = html;
+    loadUploadStatus(items);
     
     // 如果还有更多记录，显示加载指示器
     if (uploadHistory.length > uploadDisplayedCount) {
@@ -380,6 +554,52 @@ function updateUploadHistory() {
     }
 }
 
+// 一次请求查询当前显示的上传记录中尚未查询过的提取码的状态
+function loadUploadStatus(items) {
+    const codes = items.map(item => item.extractCode).filter(code => code && !(code in uploadStatus));
+    if (codes.length === 0) {
+        return;
+    }
+    
+    fetch('/file-status', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ codes: codes })
+    })
+    .then(response => response.ok ? response.json() : null)
+    .then(data => {
+        if (!data || !data.files) {
+            return;
+        }
+        Object.assign(uploadStatus, data.files);
+        document.querySelectorAll('#upload-history-content .history-status').forEach(element => {
+            const status = uploadStatus[element.dataset.code];
+            element.innerHTML = formatUploadStatus(status);
+        });
+    })
+    .catch(error => {
+        console.error('查询文件状态失败:', error);
+    });
+}
+
+function formatUploadStatus(status) {
+    if (!status) {
+        return '';
+    }
+    if (status.status === 'active') {
+        const expiresAt = new Date(status.expires_at).toLocaleString();
+        return `<span class="status-badge active">可下载</span>剩余 ${status.remaining_downloads} 次，${expiresAt} 到期`;
+    }
+    const labels = {
+        expired: '已过期',
+        exhausted: '已达下载上限',
+        missing: '已删除'
+    };
+    return `<span class="status-badge inactive">${labels[status.status] || status.status}</span>`;
+}
+
 function updateDownloadHistory() {
     const content = document.getElementById('download-history-content');
     
@@ -560,24 +780,6 @@ document.addEventListener('DOMContentLoaded', function() {
         
         const files = e.dataTransfer.files;
         if (files.length > 0) {
-            const file = files[0];
-            
-            // 使用动态配置检查文件大小
-            const maxSizeMB = systemConfig.max_upload_size;
-            const maxSizeBytes = maxSizeMB * 1024 * 1024;
-            if (file.size > maxSizeBytes) {
-                showError(`文件大小超过限制（最大 ${maxSizeMB}MB）`);
-                return;
-            }
-            
-            // 检查文件扩展名
-            const allowedExtensions = systemConfig.allowed_extensions.split(',');
-            const fileExtension = file.name.split('.').pop().toLowerCase();
-            if (allowedExtensions.length > 0 && !allowedExtensions.includes(fileExtension)) {
-                showError(`不支持的文件类型：${fileExtension}，支持的类型：${allowedExtensions.join(', ')}`);
-                return;
-            }
-            
             document.getElementById('file-input').files = files;
             handleFileUpload({ target: { files: files } });
         }
@@ -0,0 +1,20 @@
+"""测试在临时目录中的独立SQLite数据库上运行，不影响项目数据"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+WORK_DIR = tempfile.mkdtemp(prefix='lm_share_test_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORK_DIR, 'files.db')
+os.environ.setdefault('STORAGE_BACKEND', 'local')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(WORK_DIR)
+
+import lM_share  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    """初始化后的应用（不启动后台维护线程）"""
+    return lM_share.create_app()
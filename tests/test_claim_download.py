@@ -0,0 +1,88 @@
+"""claim_download在并发占用时恰好发放max_downloads次，不超发也不少发"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import lM_share
+from lM_share import File, StorageStat, claim_download, db
+
+
+@pytest.fixture
+def make_share(app):
+    created = []
+
+    def make(max_downloads, expires_in=timedelta(hours=1)):
+        with app.app_context():
+            extract_code, delete_code = lM_share.generate_codes()
+            file_record = File(
+                original_filename='test.bin',
+                filename_on_disk='test',
+                extract_code=extract_code,
+                delete_code=delete_code,
+                expires_at=datetime.now() + expires_in,
+                max_downloads=max_downloads
+            )
+            db.session.add(file_record)
+            db.session.commit()
+            created.append(file_record.id)
+            return file_record.id
+
+    yield make
+    with app.app_context():
+        File.query.filter(File.id.in_(created)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def limit_reached_files():
+    return db.session.get(StorageStat, 'limit_reached_files').value
+
+
+def test_claims_stop_at_limit(app, make_share):
+    file_id = make_share(3)
+    with app.app_context():
+        before = limit_reached_files()
+        assert [claim_download(file_id) for _ in range(5)] == [True, True, True, False, False]
+        file_record = db.session.get(File, file_id)
+        assert file_record.current_downloads == 3
+        assert file_record.limit_reached_at is not None
+        assert limit_reached_files() == before + 1
+
+
+def test_expired_share_is_not_claimed(app, make_share):
+    file_id = make_share(3, expires_in=timedelta(seconds=-1))
+    with app.app_context():
+        assert not claim_download(file_id)
+        assert db.session.get(File, file_id).current_downloads == 0
+
+
+def test_concurrent_claims_are_exact(app, make_share):
+    max_downloads = 25
+    threads = 8
+    attempts = 20
+    file_id = make_share(max_downloads)
+    claimed = []
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        count = 0
+        with app.app_context():
+            barrier.wait()
+            for _ in range(attempts):
+                try:
+                    if claim_download(file_id):
+                        count += 1
+                except Exception:
+                    # 写锁等待超时等错误：这一次没有占用，由其他尝试补上
+                    db.session.rollback()
+        claimed.append(count)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    assert sum(claimed) == max_downloads
+    with app.app_context():
+        assert db.session.get(File, file_id).current_downloads == max_downloads
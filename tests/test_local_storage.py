@@ -0,0 +1,24 @@
+"""本地存储使用绝对路径：工作目录不是项目目录时（测试在临时目录中运行）下载仍能找到文件"""
+import io
+import os
+
+from lM_share import LocalStorage
+
+
+def test_relative_root_is_made_absolute(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = LocalStorage('uploads')
+
+    assert storage.root == str(tmp_path / 'uploads')
+    assert os.path.isabs(storage.local_path('ab' * 32))
+
+
+def test_download_outside_project_dir(app):
+    client = app.test_client()
+    response = client.post('/upload', data={'file': (io.BytesIO(b'hello storage'), 'hello.txt')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+
+    download = client.get('/d/' + response.get_json()['extract_code'])
+    assert download.status_code == 200
+    assert download.data == b'hello storage'
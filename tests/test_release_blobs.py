@@ -0,0 +1,54 @@
+"""release_blobs按批核对引用：只删除没有记录引用、没有待引用登记且已过回收宽限期的存储文件"""
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import lM_share
+from lM_share import BLOB_DELETE_GRACE, File, PendingBlob, db, get_storage, release_blobs
+
+
+def put_blob(storage, tmp_path, name, age):
+    source = tmp_path / name
+    source.write_bytes(name.encode())
+    storage.put_file(name, str(source))
+    mtime = time.time() - age.total_seconds()
+    os.utime(storage.local_path(name), (mtime, mtime))
+
+
+@pytest.fixture
+def blobs(app, tmp_path):
+    old = BLOB_DELETE_GRACE + timedelta(minutes=1)
+    names = {key: key[0] * 64 for key in ('referenced', 'pending', 'orphaned', 'recent')}
+    with app.app_context():
+        storage = get_storage()
+        for key, name in names.items():
+            put_blob(storage, tmp_path, name, timedelta(0) if key == 'recent' else old)
+        extract_code, delete_code = lM_share.generate_codes()
+        file_record = File(
+            original_filename='kept.txt',
+            filename_on_disk=names['referenced'],
+            extract_code=extract_code,
+            delete_code=delete_code,
+            expires_at=datetime.now() + timedelta(hours=1)
+        )
+        db.session.add(file_record)
+        pending = PendingBlob(sha256=names['pending'])
+        db.session.add(pending)
+        db.session.commit()
+        yield names
+        db.session.delete(file_record)
+        db.session.delete(pending)
+        db.session.commit()
+        for name in names.values():
+            storage.delete(name)
+
+
+def test_only_unprotected_old_blobs_are_released(app, blobs):
+    with app.app_context():
+        storage = get_storage()
+        assert release_blobs(list(blobs.values()) * 2, storage) == 1
+        assert storage.stat(blobs['orphaned']) is None
+        for key in ('referenced', 'pending', 'recent'):
+            assert storage.stat(blobs[key]) is not None
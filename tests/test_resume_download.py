@@ -0,0 +1,38 @@
+"""断点续传不重复计数：续传请求可能由另一个工作进程处理，各进程共用session密钥"""
+import io
+import os
+
+from lM_share import SECRET_KEY_FILE, File, db
+
+CONTENT = b'0123456789' * 100
+
+
+def upload(client):
+    response = client.post('/upload', data={'file': (io.BytesIO(CONTENT), 'resume.txt'), 'max_downloads': '1'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    return response.get_json()['extract_code']
+
+
+def test_workers_share_the_session_key(app):
+    with open(os.path.join(app.instance_path, SECRET_KEY_FILE)) as f:
+        assert app.config['SECRET_KEY'] == f.read().strip()
+
+
+def test_range_resume_is_not_counted_again(app):
+    client = app.test_client()
+    extract_code = upload(client)
+
+    first = client.get('/d/' + extract_code, headers={'Range': 'bytes=0-499'})
+    assert first.status_code == 206
+    assert first.data == CONTENT[:500]
+
+    # 续传请求交给"另一个工作进程"：新的客户端只带着浏览器保存的session cookie
+    other_worker = app.test_client()
+    other_worker.set_cookie('session', client.get_cookie('session').value)
+    resumed = other_worker.get('/d/' + extract_code, headers={'Range': 'bytes=500-'})
+    assert resumed.status_code == 206
+    assert resumed.data == CONTENT[500:]
+
+    with app.app_context():
+        assert File.query.filter_by(extract_code=extract_code).one().current_downloads == 1
@@ -0,0 +1,116 @@
+"""S3Storage对boto3客户端的调用，用botocore的Stubber代替真实的对象存储"""
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip('boto3')
+from botocore.response import StreamingBody  # noqa: E402
+from botocore.stub import Stubber  # noqa: E402
+
+from lM_share import S3Storage  # noqa: E402
+
+BUCKET = 'im-share-test'
+MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    return S3Storage(BUCKET, 'imshare', region='us-east-1')
+
+
+@pytest.fixture
+def stubber(storage):
+    with Stubber(storage.client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+def test_prefix_is_required():
+    with pytest.raises(RuntimeError):
+        S3Storage(BUCKET, '')
+    with pytest.raises(RuntimeError):
+        S3Storage(BUCKET, '/')
+
+
+def record_put_keys(storage):
+    keys = []
+    storage.client.meta.events.register(
+        'before-parameter-build.s3.PutObject', lambda params, **kwargs: keys.append(params['Key'])
+    )
+    return keys
+
+
+def test_put_stream_uses_prefixed_key(storage, stubber):
+    keys = record_put_keys(storage)
+    stubber.add_response('put_object', {'ETag': '"etag"'})
+
+    storage.put_stream('ab.txt', io.BytesIO(b'hello'))
+    assert keys == ['imshare/ab.txt']
+
+
+def test_put_file_removes_spool(storage, stubber, tmp_path):
+    keys = record_put_keys(storage)
+    stubber.add_response('put_object', {'ETag': '"etag"'})
+    spool = tmp_path / 'upload.part'
+    spool.write_bytes(b'hello')
+
+    assert storage.put_file('ab.txt', str(spool)) == 5
+    assert keys == ['imshare/ab.txt']
+    assert not spool.exists()
+
+
+def test_open_with_range(storage, stubber):
+    stubber.add_response(
+        'get_object',
+        {'Body': StreamingBody(io.BytesIO(b'ell'), 3), 'ContentLength': 3},
+        {'Bucket': BUCKET, 'Key': 'imshare/ab.txt', 'Range': 'bytes=1-3'}
+    )
+
+    assert storage.open('ab.txt', 1, 3).read() == b'ell'
+
+
+def test_info_and_missing_object(storage, stubber):
+    stubber.add_response(
+        'head_object',
+        {'ContentLength': 5, 'LastModified': MODIFIED},
+        {'Bucket': BUCKET, 'Key': 'imshare/ab.txt'}
+    )
+    stubber.add_client_error('head_object', service_error_code='404', http_status_code=404)
+
+    assert storage.info('ab.txt') == (5, MODIFIED.timestamp())
+    assert storage.stat('missing.txt') is None
+
+
+def test_presigned_url_sets_download_headers(storage):
+    url = storage.presigned_url('ab.txt', 'report.pdf', 'application/pdf')
+
+    assert '/imshare/ab.txt?' in url
+    assert 'response-content-disposition=' in url
+    assert 'response-content-type=' in url
+
+
+def test_delete(storage, stubber):
+    stubber.add_response('delete_object', {}, {'Bucket': BUCKET, 'Key': 'imshare/ab.txt'})
+
+    assert storage.delete('ab.txt')
+
+
+def test_list_and_clear_stay_under_prefix(storage, stubber):
+    listing = {
+        'Contents': [{'Key': 'imshare/ab.txt', 'Size': 5, 'LastModified': MODIFIED}],
+        'CommonPrefixes': [{'Prefix': 'imshare/other/'}],
+        'IsTruncated': False
+    }
+    expected = {'Bucket': BUCKET, 'Prefix': 'imshare/', 'Delimiter': '/'}
+    stubber.add_response('list_objects_v2', listing, expected)
+    stubber.add_response('list_objects_v2', listing, expected)
+    stubber.add_response(
+        'delete_objects', {},
+        {'Bucket': BUCKET, 'Delete': {'Objects': [{'Key': 'imshare/ab.txt'}]}}
+    )
+
+    assert list(storage.list()) == [('ab.txt', 5, MODIFIED.timestamp())]
+    storage.clear()
@@ -0,0 +1,9 @@
+"""WSGI入口
+
+gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+
+各工作进程共用SECRET_KEY环境变量或instance/secret_key中的session密钥，登录状态在进程之间有效。
+"""
+from lM_share import create_app
+
+app = create_app()